@@ -1,4 +1,4 @@
-from .adapter.connection import DriveConnection, setup
+from .adapter.connection import DriveConnection, setup, use_connection
 
 
 __version__ = '0.2.8'
@@ -1,20 +1,46 @@
+import asyncio
+import collections
+import contextlib
+import csv
 import datetime
+import gzip
+import hashlib
+import io
 import logging
-import os.path
+import math
+import os
+import re
 import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from decimal import Decimal
+from functools import cached_property, partial
 from pathlib import Path
+from typing import Callable
 
 import googleapiclient
+import httplib2
+import numpy as np
 import pandas as pd
 from pandas import Timestamp
-from pandas._libs.lib import Decimal
+from pandas.api.types import infer_dtype, is_datetime64_any_dtype
 
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from google.oauth2.credentials import Credentials
 from google.oauth2 import service_account
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.model import JsonModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger('gsheet-pandas')
 timeout_in_sec = 60 * 1
@@ -23,40 +49,328 @@ socket.setdefaulttimeout(timeout_in_sec)
 
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
 DEFAULT_RANGE_NAME = '!A1:ZZ900000'
+# Number of rows fetched per request when the whole sheet is downloaded
+DOWNLOAD_CHUNK_ROWS = 100_000
+# Number of rows written per request when a large dataframe is uploaded
+UPLOAD_CHUNK_ROWS = 50_000
+# Maximum number of calls in one batch request
+BATCH_SIZE = 100
+# Number of retries with exponential backoff on rate limit, server and connection errors
+NUM_RETRIES = 5
+# Suggested size of request bodies to gzip when compression is enabled
+GZIP_MIN_BYTES = 64 * 1024
+# Number of worker threads running blocking calls of async methods
+ASYNC_POOL_SIZE = 10
 
 drive_connection = None
+_current_connection: ContextVar['DriveConnection | None'] = ContextVar('gsheet_pandas_connection', default=None)
 
 
 def setup(credentials_dir: Path, token_dir: Path = None):
+    """
+    Registers pandas extensions (pd.from_gsheet and DataFrame.to_gsheet).
+    Nothing is read from disk here: credentials are loaded and the service is built on the first call,
+    then reused by all following calls.
+    The connection is used by all threads and tasks, unless overridden with use_connection
+    :param credentials_dir: path to credentials file
+    :param token_dir: path to user token file, service account credentials are used if not set
+    """
     global drive_connection
     drive_connection = DriveConnection(credentials_dir, token_dir)
 
     def inner_generator():
         def inner(df, *args, **kwargs):
-            drive_connection.upload(df, *args, **kwargs)
+            _get_drive_connection().upload(df, *args, **kwargs)
         return inner
 
+    def from_gsheet(*args, **kwargs) -> pd.DataFrame:
+        return _get_drive_connection().download(*args, **kwargs)
+
     import pandas
     pandas.DataFrame.to_gsheet = inner_generator()
-    pandas.from_gsheet = drive_connection.download
+    pandas.from_gsheet = from_gsheet
+
+
+@contextlib.contextmanager
+def use_connection(connection: 'DriveConnection'):
+    """
+    Overrides the connection of pandas extensions in the current context, so concurrent tasks may use
+    different credentials. Threads started from the context (e.g. by run_in_executor) use the connection of setup
+    :param connection: connection used inside the block
+    """
+    token = _current_connection.set(connection)
+    try:
+        yield connection
+    finally:
+        _current_connection.reset(token)
+
+
+def _get_drive_connection() -> 'DriveConnection':
+    connection = _current_connection.get() or drive_connection
+    if connection is None:
+        raise RuntimeError('No connection, call setup() first')
+    return connection
+
+
+# Python objects uploaded as strings
+_TS_TYPES = (Timestamp, datetime.datetime, datetime.date)
+
+
+def _fix_value(x, _ts_types=_TS_TYPES, _decimal=Decimal):
+    # Default arguments make the per cell type lookups local
+    if isinstance(x, _ts_types):
+        return str(x)
+    if isinstance(x, _decimal):
+        x = float(x)
+    if isinstance(x, float) and math.isinf(x):
+        raise ValueError('Infinite values can not be uploaded to Google Sheets')
+    return x
+
+
+# Applies _fix_value over object arrays in a C loop
+_fix_values = np.frompyfunc(_fix_value, 1, 1)
+
+
+def _check_finite(col: pd.Series) -> None:
+    # Infinity is not valid JSON: json module sends it and the API rejects it, orjson would send a blank cell
+    if np.isinf(col.to_numpy(dtype=float, na_value=np.nan)).any():
+        raise ValueError(f'Column {col.name!r} contains infinite values, they can not be uploaded to Google Sheets')
 
 
 def _fix_dtypes(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.fillna('')
-    df = df.map(lambda x: str(x) if isinstance(x, (Timestamp, datetime.datetime, datetime.date)) else x)
-    df = df.map(lambda x: float(x) if isinstance(x, Decimal) else x)
+    if not any(dtype == object or is_datetime64_any_dtype(dtype) for dtype in df.dtypes):
+        # Numeric and bool frames hold no timestamps or decimals, only missing values need replacing
+        for i, dtype in enumerate(df.dtypes):
+            if dtype.kind == 'f':
+                _check_finite(df.iloc[:, i])
+        return df.fillna('') if df.isna().to_numpy().any() else df
+    df = df.copy(deep=False)
+    # One pass per column, columns are addressed by position as names may be duplicated
+    for i, dtype in enumerate(df.dtypes):
+        col = df.iloc[:, i]
+        if is_datetime64_any_dtype(dtype):
+            if col.dt.tz is None and not ((col.dt.microsecond > 0) | (col.dt.nanosecond > 0)).any():
+                # Same output as str(Timestamp) for naive whole-second values
+                df.isetitem(i, col.dt.strftime('%Y-%m-%d %H:%M:%S').fillna(''))
+            else:
+                # Offsets and fractions of a second are kept by str(Timestamp)
+                values = col.astype(object).to_numpy()
+                missing = pd.isna(values)
+                values = _fix_values(values)
+                values[missing] = ''
+                df.isetitem(i, values)
+        elif dtype == object:
+            # Only object columns may hold timestamps or decimals as python objects
+            values = col.to_numpy()
+            missing = pd.isna(values)
+            has_missing = missing.any()
+            kind = infer_dtype(values, skipna=True)
+            if kind == 'string' and not has_missing:
+                # Plain strings without gaps, e.g. columns of a downloaded sheet, need no fixing
+                continue
+            if kind == 'decimal':
+                # Decimal only columns (e.g. numeric columns read from SQL) are cast in one C loop
+                col = col.astype(float)
+                _check_finite(col)
+                df.isetitem(i, col.fillna('') if has_missing else col)
+                continue
+            values = _fix_values(values)
+            values[missing] = ''
+            df.isetitem(i, values)
+        else:
+            if dtype.kind == 'f':
+                _check_finite(col)
+            if col.hasnans:
+                df.isetitem(i, col.fillna(''))
     return df
 
 
+# Range of a single sheet, e.g. !B2:ZZ900000 or !B2
+_RANGE_PATTERN = re.compile(r'^!([A-Z]+)(\d+)(?::([A-Z]+)(\d*))?$')
+
+# Array dtypes serialized by orjson natively
+_ORJSON_NUMPY_DTYPES = {np.dtype(dtype) for dtype in ('bool', 'int8', 'int16', 'int32', 'int64', 'uint8', 'uint16',
+                                                      'uint32', 'uint64', 'float32', 'float64')}
+
+
+def _df_to_values(df: pd.DataFrame, drop_columns: bool) -> list[list]:
+    df = _fix_dtypes(df)
+    dtypes = set(df.dtypes)
+    if orjson is not None and len(dtypes) == 1 and dtypes.pop() in _ORJSON_NUMPY_DTYPES:
+        # orjson serializes numeric arrays natively, rows are passed as views of one contiguous array
+        values = list(np.ascontiguousarray(df.to_numpy()))
+    else:
+        # Rows are zipped from per column lists, mixed dtypes are not upcast into one object array
+        columns = [df.iloc[:, i].tolist() for i in range(df.shape[1])]
+        values = list(map(list, zip(*columns)))
+    if drop_columns:
+        return values
+    return [df.columns.tolist(), *values]
+
+
+# Names of columns without header, precomputed for the default range width (A:ZZ)
+_UNKNOWN_COLUMNS = tuple(f'Unknown {i}' for i in range(702))
+
+
+def _unknown_columns(count: int) -> list[str]:
+    if count <= len(_UNKNOWN_COLUMNS):
+        return list(_UNKNOWN_COLUMNS[:count])
+    return [f'Unknown {i}' for i in range(count)]
+
+
+def _parse_values(data: list[list], width: int) -> pd.DataFrame:
+    # Raw rows are written as CSV, C parser infers numeric and boolean columns in one pass, only empty cells become NaN
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(data)
+    buffer.seek(0)
+    # Columns are positional, as names passed to read_csv must be unique
+    return pd.read_csv(buffer, header=None, names=range(width), keep_default_na=False, na_values=[''],
+                       skip_blank_lines=False)
+
+
+def _values_to_df(values: list[list], header: int | None, infer_dtypes: bool = False) -> pd.DataFrame:
+    if not values:
+        raise Exception('Empty data')
+
+    if header is None:
+        if infer_dtypes:
+            return _parse_values(values, max(len(row) for row in values))
+        return pd.DataFrame(values)
+
+    columns = values[header]
+    data = values[header + 1:]
+    if len(data) == 0:
+        # Return empty df, object columns match the dtype of non-empty downloads
+        return pd.DataFrame(columns=columns, dtype=object)
+
+    width = max(len(columns), max(len(row) for row in data))
+    if width > len(columns):
+        columns = columns + _unknown_columns(width - len(columns))
+    if infer_dtypes:
+        df = _parse_values(data, width)
+        df.columns = columns
+        return df
+    # Rows are padded up front, so the frame is built once with the final columns
+    data = [row if len(row) == width else row + [None] * (width - len(row)) for row in data]
+    return pd.DataFrame(data, columns=columns, copy=False)
+
+
+def _compress_request(request, min_bytes: int | None):
+    body = request.body
+    if min_bytes is None or body is None or len(body) < min_bytes:
+        return request
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    request.body = gzip.compress(body)
+    request.body_size = len(request.body)
+    request.headers['content-encoding'] = 'gzip'
+    return request
+
+
+def _list_files_request(service, folder_id: str, page_token: str | None):
+    return service.files().list(
+        q=f"'{folder_id}' in parents",
+        pageSize=1000,
+        fields="nextPageToken, files(id, name)",
+        pageToken=page_token
+    )
+
+
+class _RateLimiter:
+    """
+    Sliding window limit of requests per period, shared by all threads of a connection
+    """
+
+    def __init__(self, max_requests: int, period: float = 60):
+        self.max_requests = max_requests
+        self.period = period
+        self._timestamps = collections.deque()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            while self._timestamps and now - self._timestamps[0] >= self.period:
+                self._timestamps.popleft()
+            if len(self._timestamps) >= self.max_requests:
+                time.sleep(self.period - (now - self._timestamps[0]))
+                self._timestamps.popleft()
+            self._timestamps.append(time.monotonic())
+
+
+class _JsonModel(JsonModel):
+    """
+    Serializes request bodies and parses responses with orjson when it is installed
+    """
+
+    def serialize(self, body_value):
+        if orjson is None:
+            return super().serialize(body_value)
+        try:
+            return orjson.dumps(body_value, option=orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            # Values orjson does not support (e.g. integers above 64 bit) are left to json module
+            return super().serialize(body_value)
+
+    def deserialize(self, content):
+        if orjson is None:
+            return super().deserialize(content)
+        try:
+            body = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # Non JSON content is returned as is by json module
+            return super().deserialize(content)
+        if self._data_wrapper and 'data' in body:
+            body = body['data']
+        return body
+
+
 class DriveConnection:
-    def __init__(self, credentials_dir: Path, token_dir: Path = None):
+    # Connection pool shared by all instances, so that API calls reuse open connections.
+    # httplib2.Http is not thread-safe, so every thread has its own pool
+    _http_local = threading.local()
+
+    def __init__(self,
+                 credentials_dir: Path,
+                 token_dir: Path = None,
+                 http: Callable[[], httplib2.Http] | None = None,
+                 max_requests_per_minute: int | None = None,
+                 gzip_min_bytes: int | None = None):
+        """
+        :param credentials_dir: path to credentials file
+        :param token_dir: path to user token file, service account credentials are used if not set
+        :param http: factory of httplib2 compatible transports (e.g. HTTP/2 adapter), called once per thread as
+        transports are not thread-safe; per thread connection pool shared by all connections if not set
+        :param max_requests_per_minute: client side limit of API requests (e.g. 60 to match the per user quota)
+        :param gzip_min_bytes: upload request bodies of at least this size are sent gzip-compressed
+        (e.g. GZIP_MIN_BYTES), compression is off if not set
+        """
         self.credentials_dir = credentials_dir
         self.token_dir = token_dir
+        self.http = http
+        self.gzip_min_bytes = gzip_min_bytes
+        self._rate_limiter = None if max_requests_per_minute is None else _RateLimiter(max_requests_per_minute)
+        # Credentials type is resolved once, user token if it is set and service account otherwise
+        self._load_creds = self._get_service_creds if token_dir is None else self._get_user_creds
+        self._creds = None
+        self._creds_lock = threading.Lock()
+        # Built services hold their connections, so they are cached per thread as well
+        self._local = threading.local()
+        # Long-lived workers of async methods, so that their services and connections are reused
+        self._executor = None
+        self._executor_workers = 0
+        self._executor_lock = threading.Lock()
 
     def _get_user_creds(self):
-        creds = None
-        if os.path.exists(self.token_dir):
-            creds = Credentials.from_authorized_user_file(self.token_dir.__str__(), SCOPES)
+        creds = self._creds
+        if creds and creds.valid:
+            return creds
+        if self.token_dir is None:
+            raise RuntimeError('token_dir is not set, service account credentials are used')
+        token_path = Path(self.token_dir)
+        # Token file is read only once, expired credentials are refreshed in memory
+        if creds is None and token_path.exists():
+            creds = Credentials.from_authorized_user_file(str(token_path), SCOPES)
         # If there are no (valid) credentials available, let the user log in.
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
@@ -65,37 +379,89 @@ class DriveConnection:
                 flow = InstalledAppFlow.from_client_secrets_file(self.credentials_dir.__str__(), SCOPES)
                 creds = flow.run_local_server(port=0)
             # Save the credentials for the next run
-            with open(self.token_dir, 'w') as token:
+            with open(token_path, 'w') as token:
                 token.write(creds.to_json())
         return creds
 
-    def _get_service_creds(self):
+    @cached_property
+    def _service_creds(self):
+        # Loaded once, the credentials refresh their own token when it expires
         return service_account.Credentials.from_service_account_file(self.credentials_dir.__str__(), scopes=SCOPES)
 
+    def _get_service_creds(self):
+        return self._service_creds
+
+    @classmethod
+    def _get_http(cls) -> httplib2.Http:
+        http = getattr(cls._http_local, 'http', None)
+        if http is None:
+            http = cls._http_local.http = httplib2.Http(timeout=timeout_in_sec)
+        return http
+
+    def _get_thread_http(self) -> httplib2.Http:
+        if self.http is None:
+            return self._get_http()
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = self.http()
+        return http
+
+    def _get_creds(self):
+        with self._creds_lock:
+            if self._creds is None or self._creds.expired:
+                self._creds = self._load_creds()
+            return self._creds
+
+    def _get_services(self) -> dict:
+        creds = self._get_creds()
+        if getattr(self._local, 'creds', None) is not creds:
+            # Services built with stale credentials are dropped together with them
+            self._local.creds = creds
+            self._local.services = {}
+        return self._local.services
+
     def _get_service(self, service_name='sheets', service_version='v4'):
-        if self.token_dir is None:
-            creds = self._get_service_creds()
-        else:
-            creds = self._get_user_creds()
+        services = self._get_services()
+        key = (service_name, service_version)
+        service = services.get(key)
+        if service is not None:
+            return service
 
         try:
-            service = build(service_name, service_version, credentials=creds)
-            return service
+            authed_http = AuthorizedHttp(self._local.creds, http=self._get_thread_http())
+            # Discovery document bundled with googleapiclient is used, no discovery request is made
+            service = build(service_name, service_version, http=authed_http, model=_JsonModel(),
+                            static_discovery=True, cache_discovery=False)
         except HttpError as err:
             logger.error(err)
             return None
+        services[key] = service
+        return service
+
+    def close(self) -> None:
+        """
+        Closes services cached by the current thread and their underlying connections
+        """
+        for service in getattr(self._local, 'services', {}).values():
+            service.close()
+        self._local.services = {}
+
+    def _wait_rate_limit(self, requests: int = 1) -> None:
+        if self._rate_limiter is not None:
+            for _ in range(requests):
+                self._rate_limiter.wait()
+
+    def _execute(self, request, num_retries: int = NUM_RETRIES):
+        self._wait_rate_limit()
+        return request.execute(num_retries=num_retries)
 
     def get_all_files_in_folder(self, folder_id):
         files = []
         try:
+            service = self._get_service('drive', 'v3')
             page_token = None
             while True:
-                response = self._get_service().files().list(
-                    q=f"'{folder_id}' in parents",
-                    pageSize=100,
-                    fields="nextPageToken, files(id, name)",
-                    pageToken=page_token
-                ).execute()
+                response = self._execute(_list_files_request(service, folder_id, page_token))
 
                 files.extend(response.get('files', []))
                 page_token = response.get('nextPageToken', None)
@@ -106,48 +472,151 @@ class DriveConnection:
             raise e
         return files
 
+    def get_all_files_in_folders(self, folder_ids: list[str]) -> dict[str, list[dict]]:
+        """
+        Lists files of several folders, one page of every folder per batch request
+        :param folder_ids: list of folder ids
+        :return: dict of files (id and name) by folder id
+        """
+        service = self._get_service('drive', 'v3')
+        files = {folder_id: [] for folder_id in folder_ids}
+        page_tokens = {folder_id: None for folder_id in folder_ids}
+
+        def callback(request_id, response, exception):
+            if exception is not None:
+                raise exception
+            files[request_id].extend(response.get('files', []))
+            page_tokens[request_id] = response.get('nextPageToken', None)
+
+        pending = list(files)
+        while pending:
+            for i in range(0, len(pending), BATCH_SIZE):
+                batch = service.new_batch_http_request(callback=callback)
+                for folder_id in pending[i:i + BATCH_SIZE]:
+                    batch.add(_list_files_request(service, folder_id, page_tokens[folder_id]), request_id=folder_id)
+                # Every call of a batch counts against the quota
+                self._wait_rate_limit(len(pending[i:i + BATCH_SIZE]))
+                batch.execute()
+            pending = [folder_id for folder_id in pending if page_tokens[folder_id] is not None]
+        return files
+
     def download(self,
                  spreadsheet_id: str,
                  sheet_name: str,
                  range_name: str = DEFAULT_RANGE_NAME,
-                 header: int | None = 0) -> pd.DataFrame:
+                 header: int | None = 0,
+                 cache_dir: Path | None = None,
+                 infer_dtypes: bool = False) -> pd.DataFrame:
         """
         Downloads Google Spreadsheet as Pandas DataFrame
         :param spreadsheet_id: spreadsheet id
         :param sheet_name: sheet name
         :param range_name: range name (default is !A1:ZZ900000)
         :param header: index of header row
+        :param cache_dir: directory to cache downloaded dataframes in until the spreadsheet changes
+        :param infer_dtypes: whether to parse numeric and boolean columns or keep all values as strings
         :return dataframe
         """
-        service = self._get_service()
-        sheet = self._get_service().spreadsheets()
-        result = sheet.values().get(spreadsheetId=spreadsheet_id, range=sheet_name + range_name).execute()
-        values = result.get('values', [])
-        service.close()
-        if not values:
-            raise Exception('Empty data')
-
-        if header is None:
-            return pd.DataFrame(values)
-
-        columns = values[header]
-        data = values[header + 1:]
-        if len(data) == 0:
-            # Return empty df
-            return pd.DataFrame(columns=columns)
-
-        df = pd.DataFrame(data)
-        if len(df.columns) > len(columns):
-            columns += [f'Unknown {i}' for i in range(len(df.columns) - len(columns))]
-        df.columns = columns
+        if cache_dir is None:
+            return self._download(spreadsheet_id, sheet_name, range_name, header, infer_dtypes)
+
+        # Drive file version is increased on every change of the spreadsheet
+        service = self._get_service('drive', 'v3')
+        version = self._execute(service.files().get(fileId=spreadsheet_id, fields='version'))['version']
+        # One file per downloaded range, it is overwritten when the spreadsheet changes
+        key = repr((spreadsheet_id, sheet_name, range_name, header, infer_dtypes))
+        key = hashlib.sha256(key.encode()).hexdigest()
+        cache_path = Path(cache_dir) / f'{key}.pkl'
+        try:
+            cached = pd.read_pickle(cache_path)
+            if cached['version'] == version:
+                return cached['df']
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            # Unreadable file is downloaded again and replaced
+            logger.warning(f'Failed to read cached dataframe {cache_path}: {e}')
+
+        df = self._download(spreadsheet_id, sheet_name, range_name, header, infer_dtypes)
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # File is written aside and moved in place, so readers never see a partially written file
+        fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pd.to_pickle(dict(version=version, df=df), f)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
         return df
 
+    def _download(self,
+                  spreadsheet_id: str,
+                  sheet_name: str,
+                  range_name: str,
+                  header: int | None,
+                  infer_dtypes: bool) -> pd.DataFrame:
+        if range_name != DEFAULT_RANGE_NAME:
+            range_name = sheet_name + range_name
+            dfs = self.download_many(spreadsheet_id, [range_name], header=header, infer_dtypes=infer_dtypes)
+            return dfs[range_name]
+
+        # Whole sheet is fetched in row chunks, so that every response stays reasonably small.
+        # Grid bounds are read first: a short chunk does not mean the end of the sheet, as the API omits
+        # trailing empty rows of every range
+        row_count, _ = self._get_sheet_bounds(spreadsheet_id, sheet_name)
+        values = []
+        for start in range(1, row_count + 1, DOWNLOAD_CHUNK_ROWS):
+            end = min(start + DOWNLOAD_CHUNK_ROWS - 1, row_count)
+            chunk = self._batch_get(spreadsheet_id, [f'{sheet_name}!A{start}:ZZ{end}'])[0]
+            values.extend(chunk)
+            # Trailing empty rows of a chunk are omitted by the API
+            values.extend([] for _ in range(end - start + 1 - len(chunk)))
+        while values and not values[-1]:
+            values.pop()
+        return _values_to_df(values, header, infer_dtypes)
+
+    def download_many(self,
+                      spreadsheet_id: str,
+                      ranges: list[str],
+                      header: int | None = 0,
+                      infer_dtypes: bool = False) -> dict[str, pd.DataFrame]:
+        """
+        Downloads several ranges of Google Spreadsheet in one request
+        :param spreadsheet_id: spreadsheet id
+        :param ranges: list of ranges including sheet name (e.g. test!A1:C100)
+        :param header: index of header row
+        :param infer_dtypes: whether to parse numeric and boolean columns or keep all values as strings
+        :return: dict of dataframes by range
+        """
+        values = self._batch_get(spreadsheet_id, ranges)
+        return {
+            range_name: _values_to_df(range_values, header, infer_dtypes)
+            for range_name, range_values in zip(ranges, values)
+        }
+
+    def _batch_get(self, spreadsheet_id: str, ranges: list[str]) -> list[list[list]]:
+        service = self._get_service()
+        request = service.spreadsheets().values().batchGet(spreadsheetId=spreadsheet_id, ranges=ranges)
+        result = self._execute(request)
+        return [value_range.get('values', []) for value_range in result.get('valueRanges', [])]
+
+    def _get_sheet_bounds(self, spreadsheet_id: str, sheet_name: str) -> tuple[int, int]:
+        service = self._get_service()
+        request = service.spreadsheets().get(spreadsheetId=spreadsheet_id,
+                                             ranges=[sheet_name],
+                                             fields='sheets.properties.gridProperties')
+        result = self._execute(request)
+        grid_properties = result['sheets'][0]['properties']['gridProperties']
+        return grid_properties.get('rowCount', 0), grid_properties.get('columnCount', 0)
+
     def upload(self,
                df: pd.DataFrame,
                spreadsheet_id: str,
                sheet_name: str,
                range_name: str = DEFAULT_RANGE_NAME,
-               drop_columns: bool = False) -> None:
+               drop_columns: bool = False,
+               append: bool = False) -> None:
         """
         Uploads Pandas DataFrame to the Google Spreadsheet
         :param df: Pandas DataFrame
@@ -155,24 +624,150 @@ class DriveConnection:
         :param sheet_name: sheet name
         :param range_name: range name (default is !A1:ZZ900000)
         :param drop_columns: whether to drop DataFrame columns or not
+        :param append: whether to insert rows after the table found in range instead of overwriting the range
         """
-        try:
-            df = _fix_dtypes(df)
-            values = df.T.reset_index().T.values.tolist()
-            if drop_columns:
-                values = df.values.tolist()
-            service = self._get_service()
-            service.spreadsheets().values().update(
+        values = _df_to_values(df, drop_columns)
+        if append:
+            self._append(spreadsheet_id, sheet_name + range_name, values)
+            return
+
+        match = _RANGE_PATTERN.match(range_name)
+        if match is not None:
+            start_column, start_row, end_column, end_row = match.groups()
+            # Rows beyond the end of range are rejected by the API, chunks must not spill over it
+            if end_row and int(start_row) + len(values) - 1 > int(end_row):
+                match = None
+        if match is None or len(values) <= UPLOAD_CHUNK_ROWS:
+            self._batch_update(spreadsheet_id, [(sheet_name + range_name, values)])
+            return
+
+        # Large frames are written in row chunks, so that every request body stays reasonably small
+        for i in range(0, len(values), UPLOAD_CHUNK_ROWS):
+            chunk = values[i:i + UPLOAD_CHUNK_ROWS]
+            chunk_range = f'{sheet_name}!{start_column}{int(start_row) + i}'
+            if end_column is not None:
+                chunk_range += f':{end_column}{int(start_row) + i + len(chunk) - 1}'
+            self._batch_update(spreadsheet_id, [(chunk_range, chunk)])
+
+    def _append(self, spreadsheet_id: str, range_name: str, values: list) -> None:
+        service = self._get_service()
+        # Every chunk is inserted after the rows appended by the previous one
+        for i in range(0, len(values), UPLOAD_CHUNK_ROWS):
+            request = service.spreadsheets().values().append(
                 spreadsheetId=spreadsheet_id,
+                range=range_name,
                 valueInputOption='RAW',
-                range=sheet_name + range_name,
-                body=dict(majorDimension='ROWS', values=values),
-            ).execute()
-            service.close()
-        except socket.timeout as e:
-            raise e
-        except Exception as e:
-            raise e
+                insertDataOption='INSERT_ROWS',
+                body=dict(majorDimension='ROWS', values=values[i:i + UPLOAD_CHUNK_ROWS]),
+            )
+            # Not retried, a timed out append may have been applied and would duplicate rows
+            self._execute(_compress_request(request, self.gzip_min_bytes), num_retries=0)
+
+    def upload_many(self,
+                    spreadsheet_id: str,
+                    data: list[tuple[str, pd.DataFrame]],
+                    drop_columns: bool = False,
+                    value_input_option: str = 'RAW') -> None:
+        """
+        Uploads several Pandas DataFrames to the Google Spreadsheet in one request
+        :param spreadsheet_id: spreadsheet id
+        :param data: list of (range, dataframe) pairs, range includes sheet name (e.g. test!A1:ZZ900000)
+        :param drop_columns: whether to drop DataFrame columns or not
+        :param value_input_option: how input data should be interpreted (RAW or USER_ENTERED)
+        """
+        self._batch_update(spreadsheet_id,
+                           [(range_name, _df_to_values(df, drop_columns)) for range_name, df in data],
+                           value_input_option)
+
+    def _batch_update(self, spreadsheet_id: str, data: list[tuple[str, list]], value_input_option: str = 'RAW'):
+        body = {
+            'valueInputOption': value_input_option,
+            'data': [dict(range=range_name, majorDimension='ROWS', values=values) for range_name, values in data],
+        }
+        service = self._get_service()
+        request = service.spreadsheets().values().batchUpdate(spreadsheetId=spreadsheet_id, body=body)
+        self._execute(_compress_request(request, self.gzip_min_bytes))
+
+    def _get_executor(self, workers: int = ASYNC_POOL_SIZE) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None or self._executor_workers < workers:
+                # A larger pool replaces the current one, calls already submitted finish on the old threads
+                previous = self._executor
+                self._executor_workers = max(workers, ASYNC_POOL_SIZE)
+                self._executor = ThreadPoolExecutor(max_workers=self._executor_workers,
+                                                    thread_name_prefix='gsheet-pandas')
+                if previous is not None:
+                    previous.shutdown(wait=False)
+            return self._executor
+
+    async def _run_async(self, func, *args):
+        executor = self._get_executor()
+        return await asyncio.get_running_loop().run_in_executor(executor, partial(func, *args))
+
+    async def aclose(self) -> None:
+        """
+        Stops worker threads of async methods together with their connections
+        """
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+            self._executor_workers = 0
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown)
+
+    async def download_async(self,
+                             spreadsheet_id: str,
+                             sheet_name: str,
+                             range_name: str = DEFAULT_RANGE_NAME,
+                             header: int | None = 0,
+                             cache_dir: Path | None = None,
+                             infer_dtypes: bool = False) -> pd.DataFrame:
+        """
+        Downloads Google Spreadsheet as Pandas DataFrame without blocking the event loop
+        :param spreadsheet_id: spreadsheet id
+        :param sheet_name: sheet name
+        :param range_name: range name (default is !A1:ZZ900000)
+        :param header: index of header row
+        :param cache_dir: directory to cache downloaded dataframes in until the spreadsheet changes
+        :param infer_dtypes: whether to parse numeric and boolean columns or keep all values as strings
+        :return dataframe
+        """
+        return await self._run_async(self.download, spreadsheet_id, sheet_name, range_name, header, cache_dir,
+                                     infer_dtypes)
+
+    async def upload_async(self,
+                           df: pd.DataFrame,
+                           spreadsheet_id: str,
+                           sheet_name: str,
+                           range_name: str = DEFAULT_RANGE_NAME,
+                           drop_columns: bool = False,
+                           append: bool = False) -> None:
+        """
+        Uploads Pandas DataFrame to the Google Spreadsheet without blocking the event loop
+        :param df: Pandas DataFrame
+        :param spreadsheet_id: spreadsheet id
+        :param sheet_name: sheet name
+        :param range_name: range name (default is !A1:ZZ900000)
+        :param drop_columns: whether to drop DataFrame columns or not
+        :param append: whether to insert rows after the table found in range instead of overwriting the range
+        """
+        await self._run_async(self.upload, df, spreadsheet_id, sheet_name, range_name, drop_columns, append)
+
+    async def download_all(self, specs: list[dict], pool_size: int = 10) -> list[pd.DataFrame]:
+        """
+        Downloads several Google Spreadsheets concurrently
+        :param specs: list of download arguments (spreadsheet_id, sheet_name, range_name, header)
+        :param pool_size: maximum number of concurrent downloads
+        :return: list of dataframes in the order of specs
+        """
+        # Worker threads must not be fewer than the allowed concurrent downloads
+        self._get_executor(pool_size)
+        semaphore = asyncio.Semaphore(pool_size)
+
+        async def download(spec: dict) -> pd.DataFrame:
+            async with semaphore:
+                return await self.download_async(**spec)
+
+        return list(await asyncio.gather(*(download(spec) for spec in specs)))
 
     def get_sheets_names(self, spreadsheet_id: str) -> list[str]:
         """
@@ -181,7 +776,7 @@ class DriveConnection:
         :return: list of names
         """
         service = self._get_service()
-        sheet_metadata = service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
+        sheet_metadata = self._execute(service.spreadsheets().get(spreadsheetId=spreadsheet_id))
         sheets = sheet_metadata.get('sheets', '')
         return [sheet.get("properties", {}).get("title") for sheet in sheets]
 
@@ -207,11 +802,11 @@ class DriveConnection:
 
         request = service.spreadsheets().batchUpdate(spreadsheetId=spreadsheet_id,
                                                      body=batch_update_spreadsheet_request_body)
+        self._wait_rate_limit()
         try:
             response = request.execute()
         except googleapiclient.errors.HttpError as e:
             if e.status_code == 400:
                 return None
             raise e
-        service.close()
         return response['replies'][0]['addSheet']['properties']['sheetId']
@@ -1,9 +1,18 @@
+import asyncio
+import datetime
+import gzip
 import os
 import random
+import re
+import tempfile
+import types
 import unittest
+from unittest import mock
 
+from decimal import Decimal
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 from adapter import connection
@@ -14,6 +23,7 @@ dotenv.load_dotenv(BASE_DIR / '.env')
 
 spreadsheet_id = os.getenv('table_name')
 sheet_name = os.getenv('sheet_name')
+folder_id = os.getenv('folder_id')
 
 
 data_dir = Path(__file__).resolve().parent.parent / 'data'
@@ -27,18 +37,36 @@ class TestConnectionMethods(unittest.TestCase):
             token_dir=data_dir / 'token.json'
         )
 
+    @classmethod
+    def setUpClass(cls):
+        # Credentials and services are loaded once and shared by all tests
+        cls.drive = cls._get_drive()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.drive.close()
+
     def test_list_sheets(self):
-        drive = self._get_drive()
+        drive = self.drive
         sheets = drive.get_sheets_names(spreadsheet_id)
         self.assertEqual(sheets, ['test', 'test2'])
 
     def test_create_sheet(self):
-        drive = self._get_drive()
+        drive = self.drive
         _id = drive.create_sheet(spreadsheet_id=spreadsheet_id, sheet_name='test2')
         self.assertIsNone(_id)
 
+    @unittest.skipIf(folder_id is None, 'folder_id is not set')
+    def test_get_all_files_in_folders(self):
+        drive = self.drive
+        files = drive.get_all_files_in_folders([folder_id])
+        self.assertEqual(list(files), [folder_id])
+
+        expected = drive.get_all_files_in_folder(folder_id)
+        self.assertEqual(sorted(f['id'] for f in files[folder_id]), sorted(f['id'] for f in expected))
+
     def test_connection_class(self):
-        drive = self._get_drive()
+        drive = self.drive
         df = drive.download(spreadsheet_id=spreadsheet_id, sheet_name=sheet_name)
 
         new_column_value = str(random.random())
@@ -48,9 +76,81 @@ class TestConnectionMethods(unittest.TestCase):
 
         df = drive.download(spreadsheet_id=spreadsheet_id, sheet_name=sheet_name)
 
-        values = df['column1'].values.tolist()
-        for value in values:
-            self.assertEqual(value, new_column_value)
+        self.assertTrue((df['column1'].to_numpy() == new_column_value).all())
+
+    def test_upload_append(self):
+        drive = self.drive
+        range_name = '!D1:D'
+        # Appended rows are inserted across the whole sheet, so the sheet is cleared for rows of previous runs
+        # not to pile up in any column
+        request = drive._get_service().spreadsheets().values().clear(spreadsheetId=spreadsheet_id,
+                                                                      range='test2', body={})
+        request.execute()
+        drive.upload(pd.DataFrame({'column3': ['first']}), spreadsheet_id=spreadsheet_id, sheet_name='test2',
+                     range_name='!D1:D2')
+
+        new_column_value = str(random.random())
+        df = pd.DataFrame({'column3': [new_column_value, new_column_value]})
+        drive.upload(df, spreadsheet_id=spreadsheet_id, sheet_name='test2', range_name=range_name,
+                     drop_columns=True, append=True)
+
+        df = drive.download(spreadsheet_id=spreadsheet_id, sheet_name='test2', range_name=range_name)
+        self.assertEqual(df.columns.tolist(), ['column3'])
+        self.assertEqual(df['column3'].tolist(), ['first', new_column_value, new_column_value])
+
+    def test_download_many(self):
+        drive = self.drive
+        ranges = [f'{sheet_name}!A1:B10', f'{sheet_name}!A1:ZZ900000']
+        dfs = drive.download_many(spreadsheet_id=spreadsheet_id, ranges=ranges)
+        self.assertEqual(list(dfs), ranges)
+
+        df = drive.download(spreadsheet_id=spreadsheet_id, sheet_name=sheet_name)
+        pd.testing.assert_frame_equal(dfs[ranges[1]], df)
+
+    def test_download_cache(self):
+        drive = self.drive
+        with tempfile.TemporaryDirectory() as cache_dir:
+            df = drive.download(spreadsheet_id=spreadsheet_id, sheet_name=sheet_name, cache_dir=Path(cache_dir))
+            cached = drive.download(spreadsheet_id=spreadsheet_id, sheet_name=sheet_name, cache_dir=Path(cache_dir))
+            self.assertEqual(len(list(Path(cache_dir).iterdir())), 1)
+
+        pd.testing.assert_frame_equal(cached, df)
+        pd.testing.assert_frame_equal(df, drive.download(spreadsheet_id=spreadsheet_id, sheet_name=sheet_name))
+
+    def test_download_infer_dtypes(self):
+        drive = self.drive
+        df = pd.DataFrame({'number': [1, 2], 'text': ['a', 'b']})
+        drive.upload(df, spreadsheet_id=spreadsheet_id, sheet_name='test2', range_name='!F1:G3')
+
+        df = drive.download(spreadsheet_id=spreadsheet_id, sheet_name='test2', range_name='!F1:G3',
+                            infer_dtypes=True)
+        self.assertTrue(pd.api.types.is_integer_dtype(df['number']))
+        self.assertEqual(df['number'].tolist(), [1, 2])
+        self.assertEqual(df['text'].tolist(), ['a', 'b'])
+
+    def test_upload_gzip(self):
+        drive = connection.DriveConnection(credentials_dir=data_dir / 'credentials.json',
+                                           token_dir=data_dir / 'token.json',
+                                           gzip_min_bytes=connection.GZIP_MIN_BYTES)
+        new_column_value = str(random.random())
+        # Body is well above the compression threshold
+        df = pd.DataFrame({'column4': [f'{new_column_value}-{i}' for i in range(5000)]})
+        drive.upload(df, spreadsheet_id=spreadsheet_id, sheet_name='test2', range_name='!H1:H5001')
+
+        df = drive.download(spreadsheet_id=spreadsheet_id, sheet_name='test2', range_name='!H1:H5001')
+        self.assertEqual(df['column4'].tolist(), [f'{new_column_value}-{i}' for i in range(5000)])
+        drive.close()
+
+    def test_upload_many(self):
+        drive = self.drive
+        new_column_value = str(random.random())
+        df1 = pd.DataFrame({'column1': [new_column_value]})
+        df2 = pd.DataFrame({'column2': [new_column_value]})
+        drive.upload_many(spreadsheet_id=spreadsheet_id, data=[('test2!A1:A2', df1), ('test2!B1:B2', df2)])
+
+        df = drive.download(spreadsheet_id=spreadsheet_id, sheet_name='test2', range_name='!A1:B2')
+        self.assertEqual(df.columns.tolist(), ['column1', 'column2'])
+        self.assertEqual(df.values.tolist(), [[new_column_value, new_column_value]])
 
     def test_pandas_extension(self):
         connection.setup(credentials_dir=data_dir / 'credentials.json', token_dir=data_dir / 'token.json')
@@ -62,9 +162,231 @@ class TestConnectionMethods(unittest.TestCase):
         df.to_gsheet(spreadsheet_id=spreadsheet_id, sheet_name=sheet_name)
 
         df = pd.from_gsheet(spreadsheet_id=spreadsheet_id, sheet_name=sheet_name)
-        values = df['column1'].values.tolist()
-        for value in values:
-            self.assertEqual(value, new_column_value)
+        self.assertTrue((df['column1'].to_numpy() == new_column_value).all())
+
+
+class TestAsyncConnectionMethods(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.drive = TestConnectionMethods._get_drive()
+
+    @classmethod
+    def tearDownClass(cls):
+        # Calls of async tests run on worker threads of the connection
+        asyncio.run(cls.drive.aclose())
+
+    async def test_upload_async(self):
+        drive = self.drive
+        df = await drive.download_async(spreadsheet_id=spreadsheet_id, sheet_name=sheet_name)
+        new_column_value = str(random.random())
+        df['column1'] = new_column_value
+
+        await drive.upload_async(df, spreadsheet_id=spreadsheet_id, sheet_name=sheet_name)
+
+        # Independent calls run concurrently
+        df, sheets = await asyncio.gather(
+            drive.download_async(spreadsheet_id=spreadsheet_id, sheet_name=sheet_name),
+            asyncio.to_thread(drive.get_sheets_names, spreadsheet_id),
+        )
+        self.assertTrue((df['column1'].to_numpy() == new_column_value).all())
+        self.assertIn(sheet_name, sheets)
+
+    async def test_download_all(self):
+        drive = self.drive
+        dfs = await drive.download_all([
+            dict(spreadsheet_id=spreadsheet_id, sheet_name=sheet_name),
+            dict(spreadsheet_id=spreadsheet_id, sheet_name=sheet_name, range_name='!A1:B10'),
+        ])
+        self.assertEqual(len(dfs), 2)
+        self.assertIn('column1', dfs[0].columns)
+
+
+class TestConversionMethods(unittest.TestCase):
+    def test_fix_datetimes(self):
+        df = pd.DataFrame({
+            'naive': pd.to_datetime(['2024-01-01 10:00:00', None]),
+            'aware': pd.to_datetime(['2024-01-01 10:00:00', None]).tz_localize('Europe/Moscow'),
+            'micro': pd.to_datetime(['2024-01-01 10:00:00.123456', None]),
+        })
+        fixed = connection._fix_dtypes(df)
+        self.assertEqual(fixed.values.tolist(), [
+            ['2024-01-01 10:00:00', '2024-01-01 10:00:00+03:00', '2024-01-01 10:00:00.123456'],
+            ['', '', ''],
+        ])
+
+    def test_fix_missing_values(self):
+        df = pd.DataFrame({'int': [1, 2], 'float': [1.5, np.nan], 'str': ['a', None]})
+        fixed = connection._fix_dtypes(df)
+        self.assertEqual(fixed.values.tolist(), [[1, 1.5, 'a'], [2, '', '']])
+        self.assertTrue(df['float'].isna().iloc[1])
+
+    def test_fix_numeric_unchanged(self):
+        df = pd.DataFrame({'int': [1, 2], 'float': [1.5, 2.5]})
+        self.assertIs(connection._fix_dtypes(df), df)
+
+    def test_fix_decimals(self):
+        df = pd.DataFrame({'decimal': [Decimal('1.5'), None]})
+        fixed = connection._fix_dtypes(df)
+        self.assertEqual(fixed['decimal'].tolist(), [1.5, ''])
+
+    def test_fix_mixed_objects(self):
+        df = pd.DataFrame({'mixed': [Decimal('2.5'), datetime.date(2024, 1, 2), 'a', 3, None]})
+        fixed = connection._fix_dtypes(df)
+        self.assertEqual(fixed['mixed'].tolist(), [2.5, '2024-01-02', 'a', 3, ''])
+
+    def test_fix_infinite_values(self):
+        # Infinity would be sent as a blank cell by orjson, it is rejected instead
+        for df in (pd.DataFrame({'float': [1.0, np.inf]}),
+                   pd.DataFrame({'float': [1.0, -np.inf], 'str': ['a', 'b']}),
+                   pd.DataFrame({'decimal': [Decimal('Infinity')]}),
+                   pd.DataFrame({'mixed': ['a', float('inf')]})):
+            with self.assertRaises(ValueError):
+                connection._fix_dtypes(df)
+
+    def test_fix_duplicate_columns(self):
+        df = pd.DataFrame([[Decimal('1'), 'a', np.nan]], columns=['x', 'x', 'x'])
+        fixed = connection._fix_dtypes(df)
+        self.assertEqual(fixed.columns.tolist(), ['x', 'x', 'x'])
+        self.assertEqual(fixed.values.tolist(), [[1.0, 'a', '']])
+
+    def test_df_to_values(self):
+        df = pd.DataFrame({'a': [1, 2], 'b': [Decimal('0.5'), None]})
+        self.assertEqual(connection._df_to_values(df, drop_columns=False), [['a', 'b'], [1, 0.5], [2, '']])
+        self.assertEqual(connection._df_to_values(df, drop_columns=True), [[1, 0.5], [2, '']])
+
+    def test_df_to_values_numeric(self):
+        # Uniform numeric frames take the orjson path when it is installed
+        df = pd.DataFrame({'a': [1, 2], 'b': [3, 4]})
+        values = connection._df_to_values(df, drop_columns=False)
+        self.assertEqual([list(row) for row in values], [['a', 'b'], [1, 3], [2, 4]])
+
+    def test_compress_request(self):
+        body = '{"values": [["a"]]}' * 100
+        request = types.SimpleNamespace(body=body, body_size=len(body), headers={})
+        connection._compress_request(request, min_bytes=len(body))
+        self.assertEqual(gzip.decompress(request.body).decode('utf-8'), body)
+        self.assertEqual(request.body_size, len(request.body))
+        self.assertEqual(request.headers['content-encoding'], 'gzip')
+
+        # Small bodies and disabled compression are sent as is
+        for min_bytes in (len(body) + 1, None):
+            request = types.SimpleNamespace(body=body, body_size=len(body), headers={})
+            connection._compress_request(request, min_bytes=min_bytes)
+            self.assertEqual((request.body, request.headers), (body, {}))
+
+    def test_values_to_df(self):
+        df = connection._values_to_df([['a', 'b'], ['1'], ['2', '3', '4']], header=0)
+        self.assertEqual(df.columns.tolist(), ['a', 'b', 'Unknown 0'])
+        self.assertEqual(df.values.tolist(), [['1', None, None], ['2', '3', '4']])
+
+        df = connection._values_to_df([['a', 'b']], header=0)
+        self.assertTrue(df.empty)
+        self.assertEqual(df.columns.tolist(), ['a', 'b'])
+
+        with self.assertRaises(Exception):
+            connection._values_to_df([], header=0)
+
+    def test_values_to_df_infer_dtypes(self):
+        df = connection._values_to_df([['a', 'b'], ['1', 'x'], ['2', '']], header=0, infer_dtypes=True)
+        self.assertEqual(df['a'].tolist(), [1, 2])
+        self.assertEqual(df['b'].tolist()[0], 'x')
+        self.assertTrue(pd.isna(df['b'].iloc[1]))
+
+        # Duplicate names and rows wider than the header
+        df = connection._values_to_df([['a', 'a'], ['1', '2', '3'], []], header=0, infer_dtypes=True)
+        self.assertEqual(df.columns.tolist(), ['a', 'a', 'Unknown 0'])
+        self.assertEqual(df.iloc[0].tolist(), [1, 2, 3])
+        self.assertTrue(df.iloc[1].isna().all())
+
+
+class _FakeSheetConnection(connection.DriveConnection):
+    def __init__(self, rows: list[list], row_count: int):
+        super().__init__(credentials_dir=data_dir / 'credentials.json')
+        self.rows = rows
+        self.row_count = row_count
+
+    def _get_sheet_bounds(self, spreadsheet_id, sheet_name):
+        return self.row_count, 3
+
+    def _batch_get(self, spreadsheet_id, ranges):
+        values = []
+        for range_name in ranges:
+            start, end = re.match(r'.*!A(\d+):ZZ(\d+)$', range_name).groups()
+            chunk = self.rows[int(start) - 1:int(end)]
+            # Trailing empty rows are omitted like by the API
+            while chunk and not chunk[-1]:
+                chunk = chunk[:-1]
+            values.append(chunk)
+        return values
+
+
+class TestDownloadMethods(unittest.TestCase):
+    @mock.patch.object(connection, 'DOWNLOAD_CHUNK_ROWS', 10)
+    def test_download_chunks(self):
+        rows = [['a', 'b']] + [[str(i), str(i)] for i in range(1, 25)]
+        rows[9] = []
+        drive = _FakeSheetConnection(rows, row_count=30)
+        df = drive.download(spreadsheet_id='spreadsheet', sheet_name='test')
+        self.assertEqual(len(df), 24)
+        self.assertEqual(df['a'].tolist()[-1], '24')
+        self.assertTrue(df.iloc[8].isna().all())
+
+
+    def test_download_cache_unreadable(self):
+        drive = _FakeSheetConnection([['a'], ['1']], row_count=2)
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                mock.patch.object(drive, '_get_service'), \
+                mock.patch.object(drive, '_execute', return_value={'version': '1'}):
+            df = drive.download(spreadsheet_id='spreadsheet', sheet_name='test', cache_dir=Path(cache_dir))
+            cache_path, = Path(cache_dir).iterdir()
+            cache_path.write_bytes(b'truncated')
+
+            # Unreadable file is a cache miss and gets replaced
+            pd.testing.assert_frame_equal(
+                drive.download(spreadsheet_id='spreadsheet', sheet_name='test', cache_dir=Path(cache_dir)), df)
+            self.assertEqual(list(Path(cache_dir).iterdir()), [cache_path])
+            pd.testing.assert_frame_equal(pd.read_pickle(cache_path)['df'], df)
+
+
+class TestSetupMethods(unittest.IsolatedAsyncioTestCase):
+    async def test_setup_in_task(self):
+        async def setup():
+            connection.setup(credentials_dir=data_dir / 'credentials.json', token_dir=data_dir / 'token.json')
+            return connection.drive_connection
+
+        async def get_connection():
+            return connection._get_drive_connection()
+
+        # Connection set up by one task is used by other tasks and executor threads
+        drive = await asyncio.create_task(setup())
+        self.assertIs(await asyncio.create_task(get_connection()), drive)
+        other = await asyncio.get_running_loop().run_in_executor(None, connection._get_drive_connection)
+        self.assertIs(other, drive)
+
+    async def test_http_factory(self):
+        transports = []
+
+        def factory():
+            transports.append(object())
+            return transports[-1]
+
+        drive = connection.DriveConnection(credentials_dir=data_dir / 'credentials.json', http=factory)
+        http = drive._get_thread_http()
+        self.assertIs(drive._get_thread_http(), http)
+        # Transports are not thread-safe, every thread gets its own
+        other = await asyncio.to_thread(drive._get_thread_http)
+        self.assertIsNot(other, http)
+        self.assertEqual(len(transports), 2)
+
+    async def test_use_connection(self):
+        connection.setup(credentials_dir=data_dir / 'credentials.json', token_dir=data_dir / 'token.json')
+        drive = TestConnectionMethods._get_drive()
+        with connection.use_connection(drive):
+            self.assertIs(connection._get_drive_connection(), drive)
+            # Executor threads do not inherit the context, the override must not leak into them
+            other = await asyncio.get_running_loop().run_in_executor(None, connection._get_drive_connection)
+            self.assertIs(other, connection.drive_connection)
+        self.assertIs(connection._get_drive_connection(), connection.drive_connection)
 
 
 if __name__ == '__main__':
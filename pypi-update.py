@@ -1,4 +1,5 @@
 import os
+import subprocess
 import dotenv
 
 dotenv.load_dotenv('.env')
@@ -6,5 +7,10 @@ dotenv.load_dotenv('.env')
 username = os.getenv('USERNAME')
 password = os.getenv('PASSWORD')
 
-os.system('poetry build')
-os.system(f'poetry publish --username {username} --password {password}')
+# poetry builds sdist and wheel in one run, credentials are passed through the environment instead of argv
+subprocess.run(['poetry', 'build'], check=True)
+subprocess.run(['poetry', 'publish'], check=True, env={
+    **os.environ,
+    'POETRY_HTTP_BASIC_PYPI_USERNAME': username,
+    'POETRY_HTTP_BASIC_PYPI_PASSWORD': password,
+})